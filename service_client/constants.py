@@ -3,3 +3,14 @@
 # author: forcemain@163.com
 
 from __future__ import annotations
+
+import sys
+
+# 常用请求方法, 驻留后urllib3内部比较可直接命中同一对象
+GET = sys.intern('GET')
+POST = sys.intern('POST')
+PUT = sys.intern('PUT')
+PATCH = sys.intern('PATCH')
+DELETE = sys.intern('DELETE')
+HEAD = sys.intern('HEAD')
+OPTIONS = sys.intern('OPTIONS')
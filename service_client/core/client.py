@@ -4,39 +4,109 @@
 
 from __future__ import annotations
 
+import socket
 import typing as t
 
-from http import HTTPStatus
+from logging import DEBUG
 from logging import getLogger
+from collections import deque
 from inspect import getmembers
+from service_client.constants import GET
+from service_client.constants import PUT
+from gevent.pool import Pool as GreenPool
+from service_client.constants import POST
+from service_client.constants import PATCH
+from service_client.constants import DELETE
 from service_green.core.green import urllib3
 from service_client.exception import ClientError
+from service_client.core.transport import Transport
+from service_client.core.transport import HttpxTransport
+from service_client.core.transport import Urllib3Transport
 
 logger = getLogger(__name__)
 
+# 连接池默认配置, 调用方应按自身并发传入匹配的maxsize
+DEFAULT_POOL_OPTIONS = {
+    'num_pools': 100,
+    'maxsize': 10,
+    'block': False,
+    'retries': False,
+    'socket_options': [
+        (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+}
+
+# 请求默认超时与重试, 二者均为不可变对象可安全复用
+DEFAULT_TIMEOUT = urllib3.Timeout(connect=5.0, read=30.0)
+DEFAULT_RETRIES = urllib3.Retry(total=3, backoff_factor=0.1)
+
+
+def get_client_apis(cls: t.Type) -> t.Tuple[t.Tuple[t.Text, BaseClientAPI], ...]:
+    """ 获取类中为BaseClientAPI实例的类属性
+
+    @param cls: 客户端类或接口类
+    @return: t.Tuple[t.Tuple[t.Text, BaseClientAPI], ...]
+    """
+    is_client_api = lambda o: isinstance(o, BaseClientAPI)
+    return tuple(getmembers(cls, predicate=is_client_api))
+
 
 class BaseClient(object):
-    """ 通用客户端基类 """
+    """ 通用客户端基类
+
+    接口对象以类属性的形式声明并通过类属性访问, 子类声明__slots__ = ()时无需为接口预留槽位;
+    接口在类创建时缓存, 类定义后再挂载的接口需调用refresh_apis后才会绑定客户端
+    """
+
+    __slots__ = ('base_url', 'debug', 'http', '_transport')
+
+    _transport: Transport
+
+    _api_attrs: t.Tuple[t.Tuple[t.Text, BaseClientAPI], ...] = ()
+
+    def __init_subclass__(cls, **kwargs: t.Any) -> None:
+        """ 子类创建时缓存接口属性
+
+        @param kwargs: 命名参数
+        """
+        super(BaseClient, cls).__init_subclass__(**kwargs)
+        cls.refresh_apis()
+
+    @classmethod
+    def refresh_apis(cls) -> None:
+        """ 重新缓存接口属性
+
+        类定义后再挂载的接口不会被自动发现, 挂载后需调用此方法
+
+        @return: None
+        """
+        cls._api_attrs = get_client_apis(cls)
 
     def __init__(
             self,
             base_url: t.Optional[t.Text] = None,
             debug: t.Optional[bool] = None,
-            pool_options: t.Optional[t.Dict[t.Text, t.Any]] = None
+            pool_options: t.Optional[t.Dict[t.Text, t.Any]] = None,
+            http2_options: t.Optional[t.Dict[t.Text, t.Any]] = None
     ) -> None:
         """ 初始化实例
 
         @param base_url: 基础路径
         @param debug: 开启调试?
-        @param pool_options: 池配置
+        @param pool_options: urllib3连接池配置, 并发调用时maxsize应与并发数匹配
+        @param http2_options: httpx.Client配置, 设置后改用httpx并忽略pool_options
         """
         self.debug = debug
-        if base_url.endswith('/'):
-            self.base_url = base_url.rstrip('/')
-        else:
-            self.base_url = base_url
-        pool_options = pool_options or {}
+        # 只去除一个结尾斜杠, 未设置时置为空串以便请求时直接拼接
+        self.base_url = base_url[:-1] if base_url and base_url.endswith('/') else (base_url or '')
+        if http2_options is not None:
+            self.http = None
+            self._transport = HttpxTransport(**http2_options)
+            return
+        pool_options = {**DEFAULT_POOL_OPTIONS, **(pool_options or {})}
         self.http = urllib3.PoolManager(**pool_options)
+        self._transport = Urllib3Transport(self.http)
 
     def __new__(cls, *args: t.Any, **kwargs: t.Any) -> BaseClient:
         """ 创建客户端实例
@@ -45,84 +115,115 @@ class BaseClient(object):
         @param kwargs: 命名参数
         """
         instance = super(BaseClient, cls).__new__(cls)
-        curr_client_instance = instance
-        is_client_api = lambda o: isinstance(o, BaseClientAPI)
-
-        def bind_sub_apis(client_api: BaseClientAPI) -> None:
-            """ 绑定接口下的接口
-
-            @param client_api: 客户端API对象
-            @return: None
-            """
-            all_sub_apis = getmembers(client_api, predicate=is_client_api)
-            for sub_api_name, sub_api in all_sub_apis:
-                sub_api.client = client_api.client
-                setattr(client_api, sub_api_name, sub_api)
-                bind_sub_apis(sub_api)
-
-        # 获取当前类中为BaseClientAPI实例的类属性
-        all_apis = getmembers(cls, predicate=is_client_api)
-        for name, api in all_apis:
-            # 向子API实例传递客户端CLIENT实例
+        # 类创建时已缓存当前类中为BaseClientAPI实例的类属性
+        all_apis = cls._api_attrs
+        if not all_apis:
+            return instance
+        # 广度优先向各级子API实例传递客户端CLIENT实例, 子API包括类属性和在__init__中创建的实例属性
+        seen = set()
+        queue = deque(api for _, api in all_apis)
+        while queue:
+            api = queue.popleft()
+            if id(api) in seen:
+                continue
+            seen.add(id(api))
             api.client = instance
-            setattr(instance, name, api)
-            bind_sub_apis(api)
+            queue.extend(sub_api for _, sub_api in type(api)._api_attrs)
+            attrs = getattr(api, '__dict__', None)
+            attrs and queue.extend(o for o in attrs.values() if isinstance(o, BaseClientAPI))
+        return instance
+
+    def request(self, method: t.Text, url: t.Text, **kwargs: t.Any) -> t.Any:
+        """ 请求处理方法
+
+        :param method: 请求方法
+        :param url: 请求地址
+        :param kwargs: 请求参数
+        :return: t.Any
+        """
+        kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+        kwargs.setdefault('retries', DEFAULT_RETRIES)
+        base_url = kwargs.pop('base_url', None) or self.base_url
+        # 仅完整的http(s)://前缀才视为绝对地址, 避免/httpapi这类路径被误判
+        if url.startswith('http://') or url.startswith('https://'):
+            req_url = url
         else:
-            return curr_client_instance
+            req_url = base_url + url
+        rsp = self._transport.request(method, req_url, **kwargs)
+        if self.debug and logger.isEnabledFor(DEBUG):
+            data = rsp.data.decode('utf-8', 'replace')
+            logger.debug('%s %s with %r, resp=%s', method, req_url, kwargs, data)
+        if 200 <= rsp.status < 300:
+            return rsp
+        raise ClientError(rsp.data.decode('utf-8'), original=req_url)
+
+    def request_many(
+            self,
+            specs: t.Iterable[t.Sequence[t.Any]],
+            concurrency: t.Optional[int] = None,
+            **kwargs: t.Any
+    ) -> t.List[t.Any]:
+        """ 并发批量请求
+
+        连接均取自同一个连接池, 并发数不宜超过pool_options中的maxsize,
+        结果顺序与specs一致, 任一请求失败时抛出其异常
+
+        :param specs: 请求描述, 每项为(method, url)或(method, url, kwargs)
+        :param concurrency: 并发数, 默认与连接池maxsize一致
+        :param kwargs: 公共请求参数
+        :return: t.List[t.Any]
+        """
+        if concurrency is None:
+            pool_kw = self.http.connection_pool_kw if self.http is not None else DEFAULT_POOL_OPTIONS
+            concurrency = pool_kw.get('maxsize') or DEFAULT_POOL_OPTIONS['maxsize']
+
+        def send(spec: t.Sequence[t.Any]) -> t.Any:
+            method, url, *extra = spec
+            options = {**kwargs, **extra[0]} if extra else kwargs
+            return self.request(method, url, **options)
+
+        return list(GreenPool(concurrency).imap(send, specs))
 
     def get(self, url: t.Text, **kwargs: t.Any) -> t.Any:
-        method = 'GET'
-        return self.request(method, url, **kwargs)
+        return self.request(GET, url, **kwargs)
 
     def post(self, url: t.Text, **kwargs: t.Any) -> t.Any:
-        method = 'POST'
-        return self.request(method, url, **kwargs)
+        return self.request(POST, url, **kwargs)
 
     def put(self, url: t.Text, **kwargs: t.Any) -> t.Any:
-        method = 'PUT'
-        return self.request(method, url, **kwargs)
+        return self.request(PUT, url, **kwargs)
 
     def patch(self, url: t.Text, **kwargs: t.Any) -> t.Any:
-        method = 'PATCH'
-        return self.request(method, url, **kwargs)
+        return self.request(PATCH, url, **kwargs)
 
     def delete(self, url: t.Text, **kwargs: t.Any) -> t.Any:
-        method = 'DELETE'
-        return self.request(method, url, **kwargs)
+        return self.request(DELETE, url, **kwargs)
 
-    def request(self, method: t.Text, url: t.Text, **kwargs: t.Any) -> t.Any:
-        """ 请求处理方法
 
-        :param method: 请求方法
-        :param url: 请求地址
-        :param kwargs: 请求参数
-        :return: t.Any
+class BaseClientAPI(object):
+    """ 客户端接口基类 """
+
+    __slots__ = ('client',)
+
+    _api_attrs: t.Tuple[t.Tuple[t.Text, BaseClientAPI], ...] = ()
+
+    def __init_subclass__(cls, **kwargs: t.Any) -> None:
+        """ 子类创建时缓存子接口属性
+
+        @param kwargs: 命名参数
         """
-        if 'timeout' not in kwargs:
-            kwargs['timeout'] = 30.0
-        if 'headers' not in kwargs:
-            kwargs['headers'] = {}
-        if 'retries' not in kwargs:
-            kwargs['retries'] = 3
-        if 'base_url' in kwargs and kwargs['base_url']:
-            base_url = kwargs.pop('base_url')
-        else:
-            base_url = self.base_url
-        req_url = url if url.startswith(('http', 'https')) else f'{base_url}{url}'
-        rsp = self.http.request(method, req_url, **kwargs)
-        data = rsp.data.decode('utf-8')
-        self.debug and logger.debug(f'{method} {req_url} with {kwargs}, resp={data}')
-        if (
-                HTTPStatus.OK.value
-                <= rsp.status <
-                HTTPStatus.MULTIPLE_CHOICES.value
-        ):
-            return rsp
-        raise ClientError(data, original=req_url)
+        super(BaseClientAPI, cls).__init_subclass__(**kwargs)
+        cls.refresh_apis()
 
+    @classmethod
+    def refresh_apis(cls) -> None:
+        """ 重新缓存子接口属性
 
-class BaseClientAPI(object):
-    """ 客户端接口基类 """
+        类定义后再挂载的子接口不会被自动发现, 挂载后需调用此方法
+
+        @return: None
+        """
+        cls._api_attrs = get_client_apis(cls)
 
     def __init__(self, client: t.Optional[BaseClient] = None) -> None:
         """ 初始化实例
@@ -133,24 +234,58 @@ class BaseClientAPI(object):
 
     @property
     def _base_url(self) -> t.Text:
-        return self.base_url if hasattr(self, 'base_url') else self.client.base_url
+        return getattr(self, 'base_url', None) or self.client.base_url
+
+    def _request(self, method: t.Text, url: t.Text, **kwargs: t.Any) -> t.Any:
+        """ 请求处理方法
+
+        :param method: 请求方法
+        :param url: 请求地址
+        :param kwargs: 请求参数
+        :return: t.Any
+        """
+        # 每次请求时读取base_url, 以便属性或重新赋值的基础路径即时生效
+        base_url = getattr(self, 'base_url', None)
+        base_url and kwargs.setdefault('base_url', base_url)
+        return self.client.request(method, url, **kwargs)
+
+    def _request_many(
+            self,
+            method: t.Text,
+            urls: t.Iterable[t.Text],
+            concurrency: t.Optional[int] = None,
+            **kwargs: t.Any
+    ) -> t.List[t.Any]:
+        """ 并发批量请求
+
+        :param method: 请求方法
+        :param urls: 请求地址列表
+        :param concurrency: 并发数, 默认与连接池maxsize一致
+        :param kwargs: 请求参数
+        :return: t.List[t.Any]
+        """
+        base_url = getattr(self, 'base_url', None)
+        base_url and kwargs.setdefault('base_url', base_url)
+        specs = ((method, url) for url in urls)
+        return self.client.request_many(specs, concurrency=concurrency, **kwargs)
 
     def _get(self, url: t.Text, **kwargs: t.Any) -> t.Any:
-        hasattr(self, 'base_url') and kwargs.update({'base_url': self.base_url})
-        return self.client.get(url, **kwargs)
+        return self._request(GET, url, **kwargs)
 
     def _post(self, url: t.Text, **kwargs: t.Any) -> t.Any:
-        hasattr(self, 'base_url') and kwargs.update({'base_url': self.base_url})
-        return self.client.post(url, **kwargs)
+        return self._request(POST, url, **kwargs)
 
     def _put(self, url: t.Text, **kwargs: t.Any) -> t.Any:
-        hasattr(self, 'base_url') and kwargs.update({'base_url': self.base_url})
-        return self.client.put(url, **kwargs)
+        return self._request(PUT, url, **kwargs)
 
     def _patch(self, url: t.Text, **kwargs: t.Any) -> t.Any:
-        hasattr(self, 'base_url') and kwargs.update({'base_url': self.base_url})
-        return self.client.patch(url, **kwargs)
+        return self._request(PATCH, url, **kwargs)
 
     def _delete(self, url: t.Text, **kwargs: t.Any) -> t.Any:
-        hasattr(self, 'base_url') and kwargs.update({'base_url': self.base_url})
-        return self.client.delete(url, **kwargs)
+        return self._request(DELETE, url, **kwargs)
+
+    def _get_many(self, urls: t.Iterable[t.Text], **kwargs: t.Any) -> t.List[t.Any]:
+        return self._request_many(GET, urls, **kwargs)
+
+    def _post_many(self, urls: t.Iterable[t.Text], **kwargs: t.Any) -> t.List[t.Any]:
+        return self._request_many(POST, urls, **kwargs)
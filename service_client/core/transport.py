@@ -0,0 +1,177 @@
+#! -*- coding: utf-8 -*-
+#
+# author: forcemain@163.com
+
+from __future__ import annotations
+
+import io
+import sys
+import typing as t
+
+from urllib.parse import urlencode
+from importlib.util import find_spec
+from service_client.constants import GET
+from service_client.constants import PUT
+from service_client.constants import HEAD
+from service_client.constants import POST
+from service_client.constants import PATCH
+from service_client.constants import DELETE
+from service_green.core.green import urllib3
+from service_client.constants import OPTIONS
+
+# 打过猴子补丁后select.epoll被移除, 导入trio会抛出AttributeError而非ImportError,
+# httpcore因此无法回退到anyio, 此时将trio按未安装处理
+if find_spec('httpx') is not None and find_spec('trio') is not None and 'trio' not in sys.modules:
+    try:
+        import trio
+    except AttributeError:
+        sys.modules['trio'] = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# 参数以urllib3为准, 这些方法的fields会被编码到查询字符串中
+URL_ENCODED_METHODS = frozenset({DELETE, GET, HEAD, OPTIONS})
+# 这些方法的fields会被编码到请求体中
+BODY_ENCODED_METHODS = frozenset({PATCH, POST, PUT})
+
+
+class Transport(t.Protocol):
+    """ 传输层协议 """
+
+    def request(self, method: t.Text, url: t.Text, **kwargs: t.Any) -> urllib3.HTTPResponse:
+        """ 发送请求
+
+        @param method: 请求方法
+        @param url: 请求地址
+        @param kwargs: 请求参数
+        @return: urllib3.HTTPResponse
+        """
+        ...
+
+
+class Urllib3Transport(object):
+    """ 基于urllib3连接池的HTTP/1.1传输层 """
+
+    def __init__(self, http: urllib3.PoolManager) -> None:
+        """ 初始化实例
+
+        @param http: 连接池管理器
+        """
+        self.http = http
+
+    def request(self, method: t.Text, url: t.Text, **kwargs: t.Any) -> urllib3.HTTPResponse:
+        """ 发送请求
+
+        @param method: 请求方法
+        @param url: 请求地址
+        @param kwargs: 请求参数
+        @return: urllib3.HTTPResponse
+        """
+        return self.http.request(method, url, **kwargs)
+
+
+class HttpxTransport(object):
+    """ 基于httpx的HTTP/2传输层
+
+    依赖可选组件, 通过pip install -U service-client[http2]安装, 请求参数沿用urllib3的约定:
+    fields按方法编码到查询字符串或请求体(默认multipart, encode_multipart=False时为表单),
+    redirect默认跟随跳转; httpx不支持单次请求重试, retries会被忽略, 连接重试可通过
+    options传入transport=httpx.HTTPTransport(retries=...)配置; 网络异常转换为对应的urllib3异常
+    """
+
+    def __init__(self, **options: t.Any) -> None:
+        """ 初始化实例
+
+        @param options: httpx.Client配置
+        """
+        if httpx is None:
+            raise ImportError('httpx is required, run pip install -U service-client[http2]')
+        options.setdefault('http2', True)
+        options.setdefault('limits', httpx.Limits(max_keepalive_connections=20, max_connections=100))
+        self.client = httpx.Client(**options)
+
+    def _timeout(self, timeout: t.Any) -> t.Any:
+        """ 将urllib3超时转换为httpx超时
+
+        @param timeout: 超时配置
+        @return: t.Any
+        """
+        if not isinstance(timeout, urllib3.Timeout):
+            return timeout
+        number = lambda v: v if isinstance(v, (int, float)) else None
+        connect, read = number(timeout.connect_timeout), number(timeout.read_timeout)
+        return httpx.Timeout(None, connect=connect, read=read)
+
+    @staticmethod
+    def _exception(e: Exception, url: t.Text) -> Exception:
+        """ 将httpx异常转换为对应的urllib3异常
+
+        @param e: httpx异常
+        @param url: 请求地址
+        @return: Exception
+        """
+        exceptions = urllib3.exceptions
+        if isinstance(e, httpx.ConnectTimeout):
+            return exceptions.ConnectTimeoutError(str(e))
+        if isinstance(e, httpx.PoolTimeout):
+            return exceptions.EmptyPoolError(None, str(e))
+        if isinstance(e, httpx.TimeoutException):
+            return exceptions.ReadTimeoutError(None, url, str(e))
+        if isinstance(e, httpx.ConnectError):
+            return exceptions.NewConnectionError(None, str(e))
+        return exceptions.ProtocolError(str(e))
+
+    def request(self, method: t.Text, url: t.Text, **kwargs: t.Any) -> urllib3.HTTPResponse:
+        """ 发送请求
+
+        @param method: 请求方法
+        @param url: 请求地址
+        @param kwargs: 请求参数, 与urllib3保持一致
+        @return: urllib3.HTTPResponse
+        """
+        headers = httpx.Headers(kwargs.get('headers'))
+        options = {'json': kwargs.get('json'), 'follow_redirects': kwargs.get('redirect', True)}
+        if 'timeout' in kwargs:
+            options['timeout'] = self._timeout(kwargs['timeout'])
+        if 'body' in kwargs:
+            options['content'] = kwargs['body']
+        fields = kwargs.get('fields')
+        # 内部调用已传入大写方法, 只有直接传入未知或非大写方法时才需要转换
+        if method in URL_ENCODED_METHODS:
+            is_url_encoded = True
+        elif method in BODY_ENCODED_METHODS:
+            is_url_encoded = False
+        else:
+            is_url_encoded = method.upper() in URL_ENCODED_METHODS
+        if fields and is_url_encoded:
+            options['params'] = fields
+        elif fields and kwargs.get('encode_multipart', True):
+            boundary = kwargs.get('multipart_boundary')
+            options['content'], content_type = urllib3.encode_multipart_formdata(fields, boundary=boundary)
+            headers.setdefault('Content-Type', content_type)
+        elif fields:
+            options['content'] = urlencode(fields)
+            headers.setdefault('Content-Type', 'application/x-www-form-urlencoded')
+        try:
+            rsp = self.client.request(method, url, headers=headers, **options)
+        except httpx.TransportError as e:
+            reason = self._exception(e, url)
+            # 与urllib3保持一致, 关闭重试时直接抛出底层异常, 否则包装为MaxRetryError
+            if kwargs.get('retries') is False:
+                raise reason from e
+            raise urllib3.exceptions.MaxRetryError(None, url, reason=reason) from e
+        rsp_headers = rsp.headers.multi_items()
+        # httpx已解压响应体, 需去掉压缩相关头并按解压后的长度重写Content-Length
+        if 'content-encoding' in rsp.headers:
+            skipped = ('content-encoding', 'content-length')
+            rsp_headers = [(k, v) for k, v in rsp_headers if k.lower() not in skipped]
+            rsp_headers.append(('Content-Length', str(len(rsp.content))))
+        # 统一转换为urllib3响应对象, 调用方无需关心底层传输层, httpx已解压响应体故不再解码
+        return urllib3.HTTPResponse(
+            body=io.BytesIO(rsp.content), headers=rsp_headers, status=rsp.status_code,
+            reason=rsp.reason_phrase, preload_content=True, decode_content=False,
+            enforce_content_length=False, request_method=method, request_url=url
+        )
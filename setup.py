@@ -26,5 +26,6 @@ setup(
         'Programming Language :: Python',
         'Programming Language :: Python :: 3.9',
     ],
-    install_requires=['service-green']
+    install_requires=['service-green', 'gevent'],
+    extras_require={'http2': ['httpx[http2]']}
 )
@@ -0,0 +1,64 @@
+#! -*- coding: utf-8 -*-
+#
+# author: forcemain@163.com
+
+from __future__ import annotations
+
+import gzip
+import json
+import time
+import pytest
+import threading
+import typing as t
+
+from http.server import ThreadingHTTPServer
+from http.server import BaseHTTPRequestHandler
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """ 回显请求信息的处理器 """
+
+    def _handle(self) -> None:
+        if self.path.startswith('/delay/'):
+            time.sleep(int(self.path.split('/')[2]) / 1000)
+        if self.path.startswith('/redirect'):
+            self.send_response(302)
+            self.send_header('Location', '/echo')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.path.startswith('/gzip'):
+            body = gzip.compress(b'compressed body')
+            self.send_response(200)
+            self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        status = int(self.path.split('/')[2]) if self.path.startswith('/status/') else 200
+        length = int(self.headers.get('Content-Length') or 0)
+        data = {
+            'method': self.command,
+            'path': self.path,
+            'headers': dict(self.headers.items()),
+            'body': self.rfile.read(length).decode('utf-8', 'replace')
+        }
+        body = b'' if status in (204, 404) else json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+    def log_message(self, *args: t.Any) -> None:
+        pass
+
+
+@pytest.fixture(scope='session')
+def server_url() -> t.Iterator[t.Text]:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), EchoHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
@@ -0,0 +1,182 @@
+#! -*- coding: utf-8 -*-
+#
+# author: forcemain@163.com
+
+from __future__ import annotations
+
+import json
+import time
+import pytest
+import typing as t
+
+from service_client.exception import ClientError
+from service_client.core.client import BaseClient
+from service_client.core.client import BaseClientAPI
+
+
+class EchoAPI(BaseClientAPI):
+    """ 回显接口 """
+
+    def echo_many(self, urls: t.List[t.Text]) -> t.List[t.Any]:
+        return self._get_many(urls)
+
+
+class EchoClient(BaseClient):
+    """ 回显客户端 """
+
+    echo = EchoAPI()
+
+
+def test_request_many_keeps_spec_order(server_url: t.Text) -> None:
+    client = EchoClient(server_url)
+    specs = [('GET', '/delay/50'), ('POST', '/delay/0'), ('GET', '/echo', {'fields': {'q': '1'}})]
+    rsps = client.request_many(specs)
+    data = [json.loads(rsp.data) for rsp in rsps]
+    assert [(d['method'], d['path']) for d in data] == [
+        ('GET', '/delay/50'), ('POST', '/delay/0'), ('GET', '/echo?q=1')
+    ]
+
+
+def test_request_many_runs_concurrently(server_url: t.Text) -> None:
+    client = EchoClient(server_url)
+    start = time.monotonic()
+    rsps = client.request_many([('GET', '/delay/300')] * 5)
+    assert len(rsps) == 5
+    # 串行需要1.5s, 并发时接近单个请求耗时
+    assert time.monotonic() - start < 0.9
+
+
+def test_request_many_defaults_concurrency_to_pool_maxsize(server_url: t.Text, monkeypatch: t.Any) -> None:
+    from service_client.core import client as module
+    sizes = []
+    origin = module.GreenPool
+    monkeypatch.setattr(module, 'GreenPool', lambda size: sizes.append(size) or origin(size))
+    EchoClient(server_url, pool_options={'maxsize': 4}).request_many([('GET', '/echo')])
+    EchoClient(server_url).request_many([('GET', '/echo')])
+    assert sizes == [4, 10]
+
+
+def test_request_many_propagates_errors(server_url: t.Text) -> None:
+    client = EchoClient(server_url)
+    with pytest.raises(ClientError):
+        client.request_many([('GET', '/echo'), ('GET', '/status/500')])
+
+
+def test_api_request_many_uses_client(server_url: t.Text) -> None:
+    client = EchoClient(server_url)
+    rsps = client.echo.echo_many(['/a', '/b'])
+    assert [json.loads(rsp.data)['path'] for rsp in rsps] == ['/a', '/b']
+
+
+class RecordClient(BaseClient):
+    """ 记录请求而不发送的客户端 """
+
+    def request(self, method: t.Text, url: t.Text, **kwargs: t.Any) -> t.Any:
+        return method, url, kwargs.get('base_url')
+
+
+def test_api_base_url_follows_reassignment() -> None:
+    class ConfigAPI(BaseClientAPI):
+        config = {'base_url': 'http://host/v1'}
+
+        @property
+        def base_url(self) -> t.Text:
+            return self.config['base_url']
+
+    class LateAPI(BaseClientAPI):
+        def __init__(self) -> None:
+            super(LateAPI, self).__init__()
+            self.base_url = 'http://late'
+
+    class NoInitAPI(BaseClientAPI):
+        def __init__(self) -> None:
+            pass
+
+    class Client(RecordClient):
+        conf = ConfigAPI()
+        late = LateAPI()
+        plain = NoInitAPI()
+
+    client = Client('http://client')
+    assert client.conf._get('/x') == ('GET', '/x', 'http://host/v1')
+    ConfigAPI.config['base_url'] = 'http://host/v2'
+    assert client.conf._get('/x') == ('GET', '/x', 'http://host/v2')
+    assert client.late._post('/y') == ('POST', '/y', 'http://late')
+    assert client.plain._get('/z') == ('GET', '/z', None)
+    assert client.plain._base_url == 'http://client'
+
+
+def test_bind_nested_api_tree() -> None:
+    class LeafAPI(BaseClientAPI):
+        pass
+
+    class InstanceSubAPI(BaseClientAPI):
+        leaf = LeafAPI()
+
+        def __init__(self) -> None:
+            super(InstanceSubAPI, self).__init__()
+            self.child = LeafAPI()
+
+    class RootAPI(BaseClientAPI):
+        def __init__(self) -> None:
+            super(RootAPI, self).__init__()
+            self.sub = InstanceSubAPI()
+
+    class Client(RecordClient):
+        root = RootAPI()
+
+    client = Client('http://client')
+    assert client.root.client is client
+    assert client.root.sub.client is client
+    assert client.root.sub.leaf.client is client
+    assert client.root.sub.child.client is client
+    assert client.root.sub.child._get('/x') == ('GET', '/x', None)
+
+
+def test_bind_class_level_nested_apis() -> None:
+    class LeafAPI(BaseClientAPI):
+        pass
+
+    class SubAPI(BaseClientAPI):
+        leaf = LeafAPI()
+
+    class Client(RecordClient):
+        sub = SubAPI()
+
+    client = Client('http://client')
+    assert Client._api_attrs == (('sub', Client.sub),)
+    assert client.sub.client is client
+    assert client.sub.leaf.client is client
+
+
+def test_bind_instance_level_sub_api() -> None:
+    class SubAPI(BaseClientAPI):
+        pass
+
+    class RootAPI(BaseClientAPI):
+        def __init__(self) -> None:
+            super(RootAPI, self).__init__()
+            self.sub = SubAPI()
+
+    class Client(RecordClient):
+        root = RootAPI()
+
+    client = Client('http://client')
+    assert client.root.sub.client is client
+
+
+def test_late_attached_api_requires_refresh() -> None:
+    class SubAPI(BaseClientAPI):
+        pass
+
+    class Client(RecordClient):
+        pass
+
+    Client.late = SubAPI()
+    Client('http://client')
+    # 类定义后挂载的接口不会被自动发现
+    assert Client.late.client is None
+    Client.refresh_apis()
+    client = Client('http://client')
+    assert client.late.client is client
+    assert client.late._get('/x') == ('GET', '/x', None)
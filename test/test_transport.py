@@ -0,0 +1,109 @@
+#! -*- coding: utf-8 -*-
+#
+# author: forcemain@163.com
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import socket
+import pytest
+import logging
+import subprocess
+import typing as t
+
+from service_green.core.green import urllib3
+from service_client.exception import ClientError
+from service_client.core.client import BaseClient
+from service_client.core.transport import HttpxTransport
+from service_client.core.transport import Urllib3Transport
+
+
+@pytest.fixture(params=['urllib3', 'httpx'])
+def client(request: t.Any, server_url: t.Text) -> BaseClient:
+    if request.param == 'httpx':
+        pytest.importorskip('httpx')
+        return BaseClient(server_url, debug=True, http2_options={})
+    return BaseClient(server_url, debug=True)
+
+
+def test_transport_selection(server_url: t.Text) -> None:
+    pytest.importorskip('httpx')
+    assert isinstance(BaseClient(server_url)._transport, Urllib3Transport)
+    assert isinstance(BaseClient(server_url, http2_options={})._transport, HttpxTransport)
+
+
+def test_http2_ignores_urllib3_pool_options(server_url: t.Text) -> None:
+    pytest.importorskip('httpx')
+    client = BaseClient(server_url, pool_options={'maxsize': 4}, http2_options={})
+    assert client.http is None
+
+
+def test_fields_encoded_in_query_string(client: BaseClient) -> None:
+    data = json.loads(client.get('/echo', fields={'q': '1'}).data)
+    assert data['path'] == '/echo?q=1'
+
+
+def test_fields_encoded_as_multipart_body(client: BaseClient) -> None:
+    rsp = client.post('/echo', fields={'name': 'value'}, multipart_boundary='boundary')
+    data = json.loads(rsp.data)
+    assert data['headers']['Content-Type'] == 'multipart/form-data; boundary=boundary'
+    assert 'name="name"\r\n\r\nvalue' in data['body']
+
+
+def test_fields_encoded_as_form_body(client: BaseClient) -> None:
+    data = json.loads(client.post('/echo', fields={'a': '1'}, encode_multipart=False).data)
+    assert data['headers']['Content-Type'] == 'application/x-www-form-urlencoded'
+    assert data['body'] == 'a=1'
+
+
+def test_redirect_followed_by_default(client: BaseClient) -> None:
+    data = json.loads(client.get('/redirect').data)
+    assert data['path'] == '/echo'
+
+
+def test_empty_body_responses(client: BaseClient, caplog: t.Any) -> None:
+    caplog.set_level(logging.DEBUG)
+    assert client.get('/status/204').data == b''
+    with pytest.raises(ClientError):
+        client.get('/status/404')
+
+
+def test_httpx_transport_after_monkey_patching() -> None:
+    pytest.importorskip('httpx')
+    pytest.importorskip('gevent')
+    code = (
+        'from gevent import monkey; monkey.patch_all()\n'
+        'from service_client.core.transport import HttpxTransport\n'
+        'HttpxTransport()\n'
+    )
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}
+    proc = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+
+
+def test_gzip_response_headers_match_body(client: BaseClient) -> None:
+    rsp = client.get('/gzip')
+    assert rsp.data == b'compressed body'
+    if isinstance(client._transport, HttpxTransport):
+        assert 'Content-Encoding' not in rsp.headers
+        assert rsp.headers['Content-Length'] == str(len(rsp.data))
+
+
+def test_connection_error_maps_to_urllib3(client: BaseClient) -> None:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    with pytest.raises(urllib3.exceptions.MaxRetryError) as e:
+        client.get(f'http://127.0.0.1:{port}/echo', retries=urllib3.Retry(0))
+    assert isinstance(e.value.reason, urllib3.exceptions.NewConnectionError)
+
+
+def test_read_timeout_maps_to_urllib3(client: BaseClient) -> None:
+    timeout = urllib3.Timeout(connect=1.0, read=0.1)
+    with pytest.raises(urllib3.exceptions.MaxRetryError) as e:
+        client.get('/delay/500', timeout=timeout, retries=urllib3.Retry(0))
+    assert isinstance(e.value.reason, urllib3.exceptions.ReadTimeoutError)
+    with pytest.raises(urllib3.exceptions.ReadTimeoutError):
+        client.get('/delay/500', timeout=timeout, retries=False)